@@ -0,0 +1,100 @@
+#
+# MIT License
+#
+# Copyright (c) 2024-2025 Manuel Werder
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Folder scanning and file validation helpers of pdfmc.
+#
+# This module is plain Python, but it is fully annotated so it can be compiled ahead of time with mypyc
+# (`mypyc _fastpath.py`, see build.bat). The compiled extension module then takes precedence over this file on import.
+#
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, product, repeat
+
+# All upper/lower case spellings of the PDF file extension, to test file names without lowercasing them first
+PDF_EXTENSIONS = frozenset(''.join(chars) for chars in product('.', 'pP', 'dD', 'fF'))
+
+log = logging.getLogger(__name__)
+
+# Maximum number of folders scanned at the same time.
+MAX_SCAN_WORKERS = 16
+
+
+def _scan_one(folder_path: str, recursive: bool = False) -> list[str]:
+    pdf_files_with_paths: list[str] = []
+    # Depth-first stack of folders to scan, which yields the files in the same order as os.walk
+    pending_folders = [folder_path]
+    while pending_folders:
+        current_folder = pending_folders.pop()
+        sub_folders: list[str] = []
+        try:
+            with os.scandir(current_folder) as entries:
+                for entry in entries:
+                    if recursive and entry.is_dir(follow_symlinks=False):
+                        sub_folders.append(entry.path)
+                    elif entry.name[-4:] in PDF_EXTENSIONS and entry.is_file():
+                        pdf_files_with_paths.append(entry.path)
+        except Exception as e:
+            if log.isEnabledFor(logging.ERROR):
+                log.error("Error processing folder %s: %s", current_folder, e)
+        pending_folders.extend(reversed(sub_folders))
+    return pdf_files_with_paths
+
+
+def get_pdf_files_in_folders(folders: list[str], recursive: bool = False) -> list[str]:
+    if not folders:
+        return []
+    # Directory reads release the GIL, so the folders are scanned concurrently; map keeps them in the given order
+    with ThreadPoolExecutor(max_workers=min(len(folders), MAX_SCAN_WORKERS)) as executor:
+        results = executor.map(_scan_one, folders, repeat(recursive))
+        return list(chain.from_iterable(results))
+
+
+def validate_pdf_files(file_paths: list[str]) -> list[str]:
+    valid_files: list[str] = []
+    for file_path in file_paths:
+        if not os.path.exists(file_path):
+            if log.isEnabledFor(logging.WARNING):
+                log.warning("File not found: %s", file_path)
+            continue
+        if file_path[-4:] not in PDF_EXTENSIONS:
+            if log.isEnabledFor(logging.WARNING):
+                log.warning("Not a PDF file: %s", file_path)
+            continue
+        valid_files.append(file_path)
+    return valid_files
+
+
+def remove_duplicate_files(file_paths: list[str], known_files: list[str]) -> list[str]:
+    # A file may be found in several folders, or be given explicitly as well, reached through different paths
+    seen_paths: set[str] = {os.path.realpath(file_path) for file_path in known_files}
+    unique_files: list[str] = []
+    for file_path in file_paths:
+        real_path = os.path.realpath(file_path)
+        if real_path in seen_paths:
+            if log.isEnabledFor(logging.WARNING):
+                log.warning("Skipping duplicate file: %s", file_path)
+            continue
+        seen_paths.add(real_path)
+        unique_files.append(file_path)
+    return unique_files
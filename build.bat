@@ -1,5 +1,6 @@
 echo off
 
+mypyc _fastpath.py
 pyinstaller --onefile pdfmc.py
 
 echo on
\ No newline at end of file
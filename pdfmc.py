@@ -22,39 +22,126 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 #
+import gc
 import logging
 import os
 from tqdm import tqdm
 
 from argparse import ArgumentParser
-from pypdf import PdfWriter
+from pypdf import PdfReader, PdfWriter
 
+from _fastpath import get_pdf_files_in_folders, remove_duplicate_files, validate_pdf_files
 
-def get_pdf_files_in_folders(folders, recursive=False):
-    pdf_files_with_paths = []
-    for folder_path in folders:
+log = logging.getLogger(__name__)
+
+# Buffer size used when writing the merged PDF file to disk.
+IO_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Estimated size of the merged PDF file relative to the total size of the input files.
+OUTPUT_SIZE_FACTOR = 1.05
+
+# Number of input files prefetched from disk ahead of the file being appended.
+PREFETCH_FILES = 16
+
+# Number of appended files after which the released source documents are garbage collected.
+GC_INTERVAL = 64
+
+# Minimum seconds between two refreshes of the progress bar, and the maximum number of refreshes per merge.
+PROGRESS_MIN_INTERVAL = 0.5
+PROGRESS_MAX_REFRESHES = 200
+
+
+def _advise_sequential(f):
+    """
+    Hint the operating system that the given file will be accessed sequentially.
+
+    :param f: Opened file object.
+    :return: None
+
+    This is a no-op on platforms without `os.posix_fadvise`.
+    """
+    if hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+
+def _total_size(files):
+    """
+    Sum up the sizes of the given files.
+
+    :param files: List of files.
+    :return: Total size in bytes, files which cannot be accessed are counted as empty.
+    """
+    total = 0
+    for file in files:
         try:
-            # Choose appropriate directory walker based on recursive flag
-            file_walker = os.walk(folder_path) if recursive else [(folder_path, None, os.listdir(folder_path))]
-            for root, _, files in file_walker:
-                pdf_files = [os.path.join(root, file) for file in files if file.lower().endswith('.pdf')]
-                pdf_files_with_paths.extend(pdf_files)
-        except Exception as e:
-            logging.error(f"Error processing folder {folder_path}: {e}")
-    return pdf_files_with_paths
-
-
-def validate_pdf_files(file_paths):
-    valid_files = []
-    for file_path in file_paths:
-        if not os.path.exists(file_path):
-            logging.warning(f"File not found: {file_path}")
-            continue
-        if not file_path.lower().endswith(".pdf"):
-            logging.warning(f"Not a PDF file: {file_path}")
+            total += os.stat(file).st_size
+        except OSError:
+            pass
+    return total
+
+
+def _preallocate(f, size):
+    """
+    Reserve disk space for a file which is about to be written.
+
+    :param f: Opened file object.
+    :param size: Number of bytes to reserve.
+    :return: None
+
+    Reserving the space upfront avoids growing the file block by block and keeps it from being fragmented. This is a
+    no-op on platforms without `os.posix_fallocate`. On file systems without native fallocate(2) support, for example
+    NFS, glibc emulates it by writing every block, which doubles the write I/O for the merged PDF there.
+    """
+    if size <= 0 or not hasattr(os, 'posix_fallocate'):
+        return
+    try:
+        os.posix_fallocate(f.fileno(), 0, size)
+    except OSError:
+        pass
+
+
+def _prefetch_all(files):
+    """
+    Ask the operating system to start reading the given files into the page cache.
+
+    :param files: List of files to be prefetched.
+    :return: None
+
+    The reads are queued in the kernel and run in the background, so the storage device can work on all of them at
+    once while the current files are being parsed. Files which cannot be opened are skipped here and reported once
+    they are parsed. This is a no-op on platforms without `os.posix_fadvise`.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for file in files:
+        try:
+            fd = os.open(file, os.O_RDONLY)
+        except OSError:
             continue
-        valid_files.append(file_path)
-    return valid_files
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+
+
+def _append_and_release(writer, file):
+    """
+    Append a PDF to the writer without keeping the source document alive.
+
+    :param writer: `PdfWriter` of the merged PDF.
+    :param file: Input PDF file to be appended.
+    :return: None
+
+    `PdfWriter.append` keeps a reference from every appended page back to its source page, and a translation table
+    for every source document. Both would keep all parsed inputs in memory until the merged PDF is written, so they
+    are dropped right after appending. The appended pages are independent copies and do not need the source anymore.
+    """
+    reader = PdfReader(file, strict=False)
+    first_page = len(writer.pages)
+    writer.append(reader)
+    for page in writer.pages[first_page:]:
+        page.__dict__.pop('original_page', None)
+    writer.reset_translation(reader)
 
 
 def merge_pdfs(input_files, output_file):
@@ -66,8 +153,9 @@ def merge_pdfs(input_files, output_file):
     :return: None
 
     This method takes a list of input PDF files and merges them into a single PDF file specified by the output file path.
-    The input files are appended one by one using the `PdfWriter.append` method from the `pypdf` library, and then the
-    merged PDF is written to the output file using the `PdfWriter.write` method.
+    The input files are appended one by one using the `PdfWriter.append` method from the `pypdf` library, while the next
+    files are prefetched from disk, and then the merged PDF is written to the output file using the `PdfWriter.write`
+    method.
 
     .. Example usage:
     >>> input_files = ["file1.pdf", "file2.pdf", "file3.pdf"]
@@ -83,13 +171,39 @@ def merge_pdfs(input_files, output_file):
     .. seealso::
         `pypdf <https://pypi.org/project/pypdf/>`_
     """
+    total_size = _total_size(input_files)
     writer = PdfWriter()
-    for file in tqdm(input_files, desc="Merging PDFs"):
+    # Without a terminal nobody sees the progress bar, so tqdm disables it (disable=None) to skip its refresh logic
+    progress_bar = tqdm(
+        total=len(input_files),
+        desc="Merging PDFs",
+        disable=None,
+        mininterval=PROGRESS_MIN_INTERVAL,
+        miniters=max(1, len(input_files) // PROGRESS_MAX_REFRESHES)
+    )
+    _prefetch_all(input_files[:PREFETCH_FILES])
+    with progress_bar as progress:
+        for index, file in enumerate(input_files):
+            # Read the next files from disk while the current ones are being appended
+            if index % PREFETCH_FILES == 0:
+                _prefetch_all(input_files[index + PREFETCH_FILES:index + 2 * PREFETCH_FILES])
+            try:
+                _append_and_release(writer, file)
+            except Exception as e:
+                log.error("Error processing file %s: %s", file, e)
+            progress.update()
+            # Released readers are only freed by the cyclic garbage collector, which rarely runs a full collection
+            # once the merged document has grown large
+            if index % GC_INTERVAL == GC_INTERVAL - 1:
+                gc.collect()
+    with open(output_file, 'wb', buffering=IO_BUFFER_SIZE) as f:
+        _advise_sequential(f)
+        _preallocate(f, int(total_size * OUTPUT_SIZE_FACTOR))
         try:
-            writer.append(file)
-        except Exception as e:
-            logging.error(f"Error processing file {file}: {e}")
-    writer.write(output_file)
+            writer.write(f)
+        finally:
+            # Cut off the part of the preallocated space which was not needed, even if writing failed
+            f.truncate()
     writer.close()
 
 
@@ -125,6 +239,8 @@ def main():
 
     args = parser.parse_args()
 
+    logging.basicConfig()
+
     files = []
 
     if args.files:
@@ -132,10 +248,11 @@ def main():
 
     if args.folders:
         pdf_files = get_pdf_files_in_folders(args.folders, recursive=args.recursive)
-        files = files + pdf_files
+        # Explicitly given files may be repeated on purpose, only the files found in folders are deduplicated
+        files = files + remove_duplicate_files(pdf_files, files)
 
     if args.dry_run:
-        logging.info("Dry run mode. Files to be merged:")
+        log.info("Dry run mode. Files to be merged:")
         for file in files:
             print(file)
         return